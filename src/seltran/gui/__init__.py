@@ -3,26 +3,33 @@ import logging
 from rich.logging import RichHandler
 import customtkinter as ctk
 
-from seltran.translator import JapaneseTranslator, TokenFilter
+from seltran.translator import (
+    TRANSLATABLE_POS,
+    WORD_START_POS,
+    JapaneseTranslator,
+    TokenFilter,
+    get_shared_translator,
+    is_shared_translator_loaded,
+)
 
 
 @dataclass(frozen=False)
 class Settings:
-    translator: JapaneseTranslator = JapaneseTranslator()
     filter_should_translate: TokenFilter = TokenFilter(
-        include_pos=[
-            "NOUN",
-            "VERB",
-            "ADJ",
-        ],
-        exclude_foreign=True,
-    )
-    filter_start_of_new_word: TokenFilter = TokenFilter(
-        include_pos=[
-            "VERB",
-            "NOUN",
-        ]
+        include_pos=TRANSLATABLE_POS, exclude_foreign=True
     )
+    filter_start_of_new_word: TokenFilter = TokenFilter(include_pos=WORD_START_POS)
+
+    @property
+    def translator(self) -> JapaneseTranslator:
+        return self.load_translator()
+
+    def load_translator(self) -> JapaneseTranslator:
+        return get_shared_translator()
+
+    @property
+    def is_translator_loaded(self) -> bool:
+        return is_shared_translator_loaded()
 
 
 from .app import App
@@ -53,11 +53,8 @@ class App(ctk.CTk, TkCallQueue):
         if not path:
             return
 
-        with open(path, "r") as f:
-            text = f.read()
-
-        self.editor.set_text(text)
-        self.editor.detect_tokens()
+        # Reading a large file can take a while, so it's done without blocking the UI
+        self.editor.import_text_file(path)
 
     def prompt_save_as_text(self):
         path = tkfd.asksaveasfilename()
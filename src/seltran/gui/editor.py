@@ -1,14 +1,25 @@
+import bisect
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-import threading
-from typing import Callable, Optional
+import itertools
+import logging
+import operator
+import re
+from typing import Iterable, Optional
 import tkinter as tk
 import customtkinter as ctk
+from spacy.attrs import IDX, IS_SPACE, LENGTH
+from spacy.symbols import PUNCT
 from spacy.tokens import Token, Doc
-import random
 from seltran.gui import Settings
 from seltran.gui.app import TkCallQueue
 
+logger = logging.getLogger(__name__)
+
+# Number of characters read from an imported file at a time
+IMPORT_CHUNK_SIZE = 64 * 1024
+
 TAG_TRANSLATABLE = "translatable"
 TAG_SELECTED_TOKEN = "selected"
 _TAG_TOKEN = "_token-"
@@ -36,8 +47,48 @@ class TagInfo:
     range: IndexRange
 
 
-def is_token_tag(tag: Tag) -> bool:
-    return tag.startswith(_TAG_TOKEN)
+_NEWLINE = re.compile("\n")
+
+_LINE_COLUMN_INDEX = re.compile(r"(\d+)\.(\d+)")
+
+_COMPARISON_OPS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    ">=": operator.ge,
+    ">": operator.gt,
+    "!=": operator.ne,
+}
+
+
+def parse_line_column(index: Index) -> Optional[tuple[int, int]]:
+    """Parse a plain `line.column` index to a (line, column) pair.
+
+    :param Index index: Index to parse
+    :return Optional[tuple[int, int]]: (line, column), or None for any other index form
+    """
+    match = _LINE_COLUMN_INDEX.fullmatch(index)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+class TextIndexer:
+    """Converts between character offsets in a fixed text and `line.column` indices,
+    which Tk can use directly without any index arithmetic.
+    """
+
+    def __init__(self, text: str):
+        self._line_starts = [0]
+        self._line_starts.extend(match.end() for match in _NEWLINE.finditer(text))
+
+    def index(self, offset: int) -> Index:
+        line = bisect.bisect_right(self._line_starts, offset) - 1
+        return f"{line + 1}.{offset - self._line_starts[line]}"
+
+    def offset(self, index: Index) -> int:
+        line, column = index.split(".")
+        return self._line_starts[int(line) - 1] + int(column)
 
 
 class EditorTextbox(ctk.CTkTextbox):
@@ -46,17 +97,16 @@ class EditorTextbox(ctk.CTkTextbox):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def is_index_in_range(self, index: Index, start: Index, end: Index) -> bool:
-        return self.compare(start, "<=", index) and self.compare(index, "<", end)
-
-    def is_range_in_range(
-        self, small_range: IndexRange, large_range: IndexRange
-    ) -> bool:
-        return self.is_index_in_range(
-            small_range.start, large_range.start, large_range.end
-        ) and self.is_index_in_range(
-            small_range.end, large_range.start, large_range.end + "+1c"
-        )
+    def compare_(self, index1: Index, op: str, index2: Index) -> bool:
+        """Like the regular `compare`, but plain `line.column` indices are compared
+        in Python rather than through Tk. Such indices are assumed to be normalized,
+        as those returned by Tk are.
+        """
+        position1 = parse_line_column(index1)
+        position2 = parse_line_column(index2)
+        if position1 is None or position2 is None:
+            return self.compare(index1, op, index2)
+        return _COMPARISON_OPS[op](position1, position2)
 
     def tag_ranges_(self, tag: Tag) -> list[IndexRange]:
         """Thin wrapper around the regular `tag_ranges` with a more sane output format.
@@ -64,90 +114,102 @@ class EditorTextbox(ctk.CTkTextbox):
         :param str tag: Tag name to get ranges of
         :return list[IndexRange]: [(start, end), ...]
         """
-        tag_ranges = self.tag_ranges(tag)
+        # Pair up the flat (start, end, start, end, ...) output
+        indices = iter(self.tag_ranges(tag))
         return [
-            IndexRange(str(tag_ranges[i]), str(tag_ranges[i + 1]))
-            for i in range(0, len(tag_ranges), 2)
+            IndexRange(str(start), str(end)) for start, end in zip(indices, indices)
         ]
 
-    def overlapping_tag_names(self, index_range: IndexRange) -> set[str]:
-        range_size = self._textbox.count(index_range.start, index_range.end, "chars")[0]
-        return set(
-            tag_name
-            for i in range(range_size)
-            for tag_name in self.tag_names(index_range.start + f"+{i}c")
+    def tag_add_many(self, tag_infos: Iterable[TagInfo]):
+        """Add multiple tags, each to its own range, using a single Tk call.
+
+        :param Iterable[TagInfo] tag_infos: Tags and the range to add each one to
+        """
+        args = tuple(
+            arg
+            for info in tag_infos
+            for arg in (info.tag, info.range.start, info.range.end)
         )
+        if args:
+            # Loop over the ranges inside Tcl instead of calling into it per tag.
+            # The arguments are passed as a Tcl list, so tkinter handles quoting.
+            self._textbox.tk.call(
+                "apply",
+                ("w ranges", "foreach {t s e} $ranges {$w tag add $t $s $e}"),
+                self._textbox._w,
+                args,
+            )
 
-    def get_tags_of_exactly_range(self, tag_range: IndexRange) -> list[Tag]:
-        tags = []
+    def tag_delete_many(self, tags: Iterable[Tag]):
+        """Delete multiple tags using a single Tk call.
 
-        for tag in self.tag_names():
-            tag_ranges = self.tag_ranges_(tag)
-            if tag_range in tag_ranges:
-                tags.append(tag)
+        :param Iterable[Tag] tags: Names of the tags to delete
+        """
+        if tags := tuple(tags):
+            # The ctk wrapper only forwards a single tag
+            self._textbox.tag_delete(*tags)
 
-        return tags
+    def tag_range_at(self, tag: Tag, index: Index) -> IndexRange:
+        """Get the range of `tag` containing `index`, which must be tagged as `tag`.
+
+        :param str tag: Tag name to get the range of
+        :param Index index: Index contained in the returned range
+        :return IndexRange: (start, end)
+        """
+        # The closest range starting before the next character is the one
+        # containing `index`, as ranges of the same tag never overlap
+        start, end = self.tag_prevrange(tag, f"{index}+1c")
+        return IndexRange(str(start), str(end))
+
+    def _tags_covering_ends(self, tag_range: IndexRange) -> list[Tag]:
+        """Get the tags applied to both the first and the last characters of a range,
+        which are the only candidates for containing the whole range.
+        """
+        start_tags = self.tag_names(tag_range.start)
+        if not self.compare_(tag_range.start, "<", tag_range.end):
+            return list(start_tags)
+
+        end_tags = set(self.tag_names(f"{tag_range.end}-1c"))
+        return [tag for tag in start_tags if tag in end_tags]
 
     def get_tags_containing_range(
         self, tag_range: IndexRange
     ) -> dict[Tag, list[IndexRange]]:
         tags = defaultdict(list)
 
-        for tag in self.tag_names():
-            tag_ranges = self.tag_ranges_(tag)
-            for checked_range in tag_ranges:
-                if self.is_range_in_range(tag_range, checked_range):
-                    tags[tag].append(checked_range)
+        # A tag applied to both ends may still have a gap in between, so the range
+        # containing the first character is checked to cover the end as well
+        for tag in self._tags_covering_ends(tag_range):
+            checked_range = self.tag_range_at(tag, tag_range.start)
+            if self.compare_(tag_range.end, "<=", checked_range.end):
+                tags[tag].append(checked_range)
 
         return tags
 
-    def get_tag_ranges_for_event(self, event, tag: Tag) -> list[IndexRange]:
-        """Find all index ranges of a specific tag matching an event's location
-
-        :param event: Tk event
-        :param str tag: Tag name to match the event's location against
-        :return list[IndexRange]: All matching index ranges which are tagged as `tag` and contain the event location
-        """
-        event_index = self.index(f"@{event.x},{event.y}")
-        tag_ranges = self.tag_ranges_(tag)
-
-        def in_range_filter(tag_range: IndexRange) -> bool:
-            return self.is_index_in_range(event_index, tag_range.start, tag_range.end)
-
-        return list(filter(in_range_filter, tag_ranges))
-
     def remove_all_of_tag(self, tag: Tag):
         self.tag_remove(tag, "1.0", "end")
 
-    def tag_names_filtered(self, filter_op: Callable[[Tag], bool]):
-        for tag in self.tag_names():
-            if filter_op(tag):
-                yield tag
-
-    def tag_query(self, tag_filter: Callable[[str], bool]) -> dict[Tag, IndexRange]:
-        tags = dict()
-        for tag in self.tag_names_filtered(tag_filter):
-            tag_ranges = self.tag_ranges_(tag)
-            # ignore tags which don't have any real text assigned
-            if not tag_ranges:
-                continue
-            tags[tag] = tag_ranges[0]
-        return tags
-
-    def replace_text(self, index_range: IndexRange, new_text: str) -> IndexRange:
-        old_tags = self.get_tags_containing_range(index_range)
+    def replace_text(
+        self,
+        index_range: IndexRange,
+        new_text: str,
+        tags: Optional[Iterable[Tag]] = None,
+    ):
+        """Replace the text of a range, keeping the tags which contained it.
+
+        :param IndexRange index_range: Range of the text to replace
+        :param str new_text: Text to put instead
+        :param Optional[Iterable[Tag]] tags: Tags of the new text if already known,
+            otherwise all tags containing `index_range` are kept
+        """
+        if tags is None:
+            tags = self.get_tags_containing_range(index_range)
 
         # Deleting the selected range also removes all tags from the range
         self.delete(index_range.start, index_range.end)
 
-        self.insert(index_range.start, new_text)
-        new_range = IndexRange(
-            index_range.start, f"{index_range.start}+{len(new_text)}c"
-        )
-        for tag in old_tags:
-            self.tag_add(tag, new_range.start, new_range.end)
-
-        return new_range
+        # The new text is tagged as it's inserted rather than with a call per tag
+        self.insert(index_range.start, new_text, tuple(tags))
 
 
 class Editor(ctk.CTkFrame):
@@ -157,7 +219,14 @@ class Editor(ctk.CTkFrame):
         self.settings = settings
         self.tokens: Optional[Doc] = None
         self.token_tags: dict[str, Token] = dict()
+        self._token_tag_ids = itertools.count()
         self._ui_call_queue = call_queue
+        # A single worker runs NLP tasks and text imports one after the other, never
+        # concurrently, so a detection never reads a partially imported text
+        self._nlp_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="nlp"
+        )
+        self._nlp_future: Optional[Future] = None
 
         self.textbox = EditorTextbox(master=self)
         # self.textbox.tag_config(TAG_TRANSLATABLE, background="blue")
@@ -185,11 +254,7 @@ class Editor(ctk.CTkFrame):
         self.status_bar.grid(row=2, column=0, sticky="EW")
 
     def _get_free_token_tag(self) -> Tag:
-        while True:
-            id = str(random.randint(0, 10000000000))
-            tag = TAG_TOKEN(id)
-            if tag not in self.token_tags:
-                return tag
+        return TAG_TOKEN(str(next(self._token_tag_ids)))
 
     def reset_content(self):
         self.textbox.delete("1.0", "end")
@@ -201,38 +266,107 @@ class Editor(ctk.CTkFrame):
     def reset_status(self):
         self.status.set("")
 
-    def clean_stale_tokens(self):
-        existing_token_tags = self.textbox.tag_query(is_token_tag)
-        existing_token_tag_names = set(existing_token_tags.keys())
+    def clean_stale_tokens(self) -> dict[Tag, list[IndexRange]]:
+        """Clean up token tags which were deleted from the text.
 
-        # Clean up token tags which were deleted from the text
+        :return dict[Tag, list[IndexRange]]: {token tag: ranges, ...} of remaining tags
+        """
+        # `token_tags` holds every live token tag, so there's no need to scan all of
+        # the textbox's tag names
+        token_tag_ranges = dict()
+        stale_tags = []
         for tag in list(self.token_tags.keys()):
-            if tag not in existing_token_tag_names:
+            if tag_ranges := self.textbox.tag_ranges_(tag):
+                token_tag_ranges[tag] = tag_ranges
+            else:
                 del self.token_tags[tag]
-                self.textbox.tag_delete(tag)
+                stale_tags.append(tag)
+
+        self.textbox.tag_delete_many(stale_tags)
+        return token_tag_ranges
+
+    @staticmethod
+    def _merge_spans(
+        index_ranges: Iterable[IndexRange], indexer: TextIndexer
+    ) -> tuple[list[int], list[int]]:
+        """Convert index ranges to character spans, merged into disjoint spans.
+
+        :param Iterable[IndexRange] index_ranges: Ranges to merge
+        :param TextIndexer indexer: Indexer of the current text
+        :return tuple[list[int], list[int]]: (span starts, span ends), sorted by offset
+        """
+        spans = sorted(
+            (indexer.offset(r.start), indexer.offset(r.end)) for r in index_ranges
+        )
+
+        starts: list[int] = []
+        ends: list[int] = []
+        for start, end in spans:
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return starts, ends
 
     def add_tokens(self, tokens: Doc):
-        for token in tokens:
-            token_range = IndexRange(
-                f"1.0+{token.idx}c", f"1.0+{token.idx + len(token.text)}c"
-            )
+        # The text is locked while tokens are detected, so it matches the tokens' text
+        indexer = TextIndexer(tokens.text)
+        token_tag_ranges = self.clean_stale_tokens()
+        tagged_starts, tagged_ends = self._merge_spans(
+            itertools.chain.from_iterable(token_tag_ranges.values()), indexer
+        )
+        # Character spans to tag as translatable, with adjacent tokens merged
+        translatable_spans: list[list[int]] = []
+        new_token_tags = []
+
+        # Read the needed attributes of all tokens in one go, so token objects are
+        # only created for tokens which actually get tagged
+        token_attrs = tokens.to_array([IDX, LENGTH, IS_SPACE]).tolist()
+        for i, (token_start, token_length, is_space) in enumerate(token_attrs):
+            # Whitespace has nothing to translate or phonetize
+            if is_space:
+                continue
+
+            token_end = token_start + token_length
 
             # Don't tag the token again if the text is already tagged with a token tag
             # left from a previous translation
-            overlapping_tags = self.textbox.overlapping_tag_names(token_range)
-            overlapping_token_tags_iter = filter(is_token_tag, overlapping_tags)
-            if any(overlapping_token_tags_iter):
+            span_i = bisect.bisect_left(tagged_starts, token_end) - 1
+            if span_i >= 0 and tagged_ends[span_i] > token_start:
                 continue
 
+            token_range = IndexRange(
+                indexer.index(token_start), indexer.index(token_end)
+            )
             new_token_tag = self._get_free_token_tag()
-            self.token_tags[new_token_tag] = token
-            self.textbox.tag_add(new_token_tag, token_range.start, token_range.end)
-            self.textbox.tag_add(TAG_TRANSLATABLE, token_range.start, token_range.end)
+            self.token_tags[new_token_tag] = tokens[i]
+            new_token_tags.append(TagInfo(new_token_tag, token_range))
+
+            if translatable_spans and translatable_spans[-1][1] == token_start:
+                translatable_spans[-1][1] = token_end
+            else:
+                translatable_spans.append([token_start, token_end])
+
+        translatable_tags = (
+            TagInfo(
+                TAG_TRANSLATABLE, IndexRange(indexer.index(start), indexer.index(end))
+            )
+            for start, end in translatable_spans
+        )
+        self.textbox.tag_add_many(itertools.chain(new_token_tags, translatable_tags))
 
     def _threaded_nlp_task(self):
         """Analyze tokens in text box and update the editor accordingly. Meant to be run in a different thread
         as processing time can be high - therefore all ui calls should be done using the call queue API.
         """
+        if not self.settings.is_translator_loaded:
+            self._ui_call_queue.queue_ui_call(
+                self.set_status, "Loading language model..."
+            )
+            self._ui_call_queue.signal_process_ui_calls()
+            self.settings.load_translator()
+
         _, text_future = self._ui_call_queue.queue_ui_calls(
             (
                 (self.set_status, ("Detecting tokens...",), None),
@@ -242,11 +376,12 @@ class Editor(ctk.CTkFrame):
         self._ui_call_queue.signal_process_ui_calls()
         text = text_future.wait()
 
-        self.tokens = self.settings.translator.nlp(text)
+        # Detecting tokens again without editing the text would yield the same tokens
+        if self.tokens is None or self.tokens.text != text:
+            self.tokens = self.settings.translator.tokenize(text)
 
         self._ui_call_queue.queue_ui_calls(
             (
-                (self.clean_stale_tokens, None, None),
                 (self.set_status, ("Marking detected tokens...",), None),
                 (self.add_tokens, (self.tokens,), None),
                 (self.unlock_text, None, None),
@@ -256,8 +391,74 @@ class Editor(ctk.CTkFrame):
         self._ui_call_queue.signal_process_ui_calls()
 
     def detect_tokens(self):
-        nlp_thread = threading.Thread(target=self._threaded_nlp_task)
-        nlp_thread.start()
+        # A detection which is queued but hasn't started yet will read the latest text
+        # anyway, so rapid repeated requests are coalesced into it
+        if self._nlp_future is not None and not (
+            self._nlp_future.running() or self._nlp_future.done()
+        ):
+            return
+
+        self._nlp_future = self._nlp_executor.submit(self._threaded_nlp_task)
+        self._nlp_future.add_done_callback(self._log_nlp_task_error)
+
+    @staticmethod
+    def _log_nlp_task_error(future: Future):
+        if (error := future.exception()) is not None:
+            logger.error("Token detection failed", exc_info=error)
+
+    def import_text_file(self, path: str):
+        """Replace the text with a text file's content, then detect its tokens.
+
+        :param str path: Path of the text file
+        """
+        self._nlp_executor.submit(self._threaded_import_text_file, path)
+
+    def _threaded_import_text_file(self, path: str):
+        """Read a text file into the editor in chunks. Meant to be run in a different
+        thread - therefore all ui calls are done using the call queue API.
+        """
+        try:
+            with open(path, "r") as f:
+                # Read the start of the file before touching the text, so a file which
+                # can't be opened or decoded leaves it as is
+                chunk = f.read(IMPORT_CHUNK_SIZE)
+                try:
+                    previous_text = self._ui_call_queue.wait_ui_call(
+                        self.begin_import
+                    )
+                except Exception:
+                    # Don't leave the text locked or the status stuck, however far
+                    # the failed call got
+                    self._ui_call_queue.queue_ui_call(self.end_import)
+                    self._ui_call_queue.signal_process_ui_calls()
+                    raise
+
+                try:
+                    while chunk:
+                        self._ui_call_queue.queue_ui_call(self.append_text, chunk)
+                        self._ui_call_queue.signal_process_ui_calls()
+                        chunk = f.read(IMPORT_CHUNK_SIZE)
+                except Exception:
+                    # Put back the text which the partial import replaced
+                    self._ui_call_queue.queue_ui_calls(
+                        (
+                            (self.end_import, None, None),
+                            (self.set_text, (previous_text,), None),
+                        )
+                    )
+                    self._ui_call_queue.signal_process_ui_calls()
+                    raise
+        except Exception:
+            logger.exception(f"Failed to import text file {path}")
+            return
+
+        self._ui_call_queue.queue_ui_calls(
+            (
+                (self.end_import, None, None),
+                (self.detect_tokens, None, None),
+            )
+        )
+        self._ui_call_queue.signal_process_ui_calls()
 
     def get_token_tag_for_event(self, event) -> Optional[TagInfo]:
         """Find the token tag which contains an event's location, if there is one.
@@ -265,16 +466,22 @@ class Editor(ctk.CTkFrame):
         :param event: Tk event
         :return Optional[TagInfo]: (tag_name, (start_index, end_index)) or None
         """
-        for token_tag in self.textbox.tag_names_filtered(is_token_tag):
-            tag_ranges = self.textbox.get_tag_ranges_for_event(event, token_tag)
-            if tag_ranges:
-                # Return first tag range as token tags are assumed to only appear once
-                return TagInfo(token_tag, tag_ranges[0])
+        event_index = self.textbox.index(f"@{event.x},{event.y}")
+        for tag in self.textbox.tag_names(event_index):
+            # `token_tags` holds exactly the live token tags, so membership in it is
+            # both the cheapest and the most accurate check
+            if tag in self.token_tags:
+                # Token tags are assumed to only appear once at any index
+                return TagInfo(tag, self.textbox.tag_range_at(tag, event_index))
         return None
 
     def get_token_tag_of_range(self, tag_range: IndexRange) -> Optional[Tag]:
-        for tag in self.textbox.get_tags_of_exactly_range(tag_range):
-            if is_token_tag(tag):
+        # Only resolve the ranges of live token tags, skipping any other tag
+        for tag in self.textbox.tag_names(tag_range.start):
+            if (
+                tag in self.token_tags
+                and self.textbox.tag_range_at(tag, tag_range.start) == tag_range
+            ):
                 return tag
         return None
 
@@ -301,9 +508,17 @@ class Editor(ctk.CTkFrame):
         token = self.token_tags[token_tag]
         self.update_possible_translations(token)
 
-        self.textbox.tag_remove(TAG_SELECTED_TOKEN, "1.0", "end")
+        # Only a single token is selected at a time, so only its range needs clearing
+        if selected_range := self.textbox.tag_nextrange(TAG_SELECTED_TOKEN, "1.0"):
+            self.textbox.tag_remove(TAG_SELECTED_TOKEN, *selected_range)
         self.textbox.tag_add(TAG_SELECTED_TOKEN, clicked_range.start, clicked_range.end)
 
+    def _set_possible_translation_values(self, values: list[str]):
+        # Reconfiguring the values rebuilds the whole dropdown menu, which is
+        # wasteful when selecting the same word again
+        if values != self.select_translation_combo.cget("values"):
+            self.select_translation_combo.configure(values=values)
+
     def update_possible_translations(self, token: Token):
         translations = (
             self.settings.translator.get_dictionary_translations(token)
@@ -315,9 +530,7 @@ class Editor(ctk.CTkFrame):
             if (phonemes := self.settings.translator.get_phonemes(token))
             else []
         )
-        self.select_translation_combo.configure(
-            values=[token.text] + phonemes + translations
-        )
+        self._set_possible_translation_values([token.text] + phonemes + translations)
 
         if phonemes or translations:
             self.select_translation_combo.set("Select translation...")
@@ -325,7 +538,7 @@ class Editor(ctk.CTkFrame):
             self.select_translation_combo.set("No available translation")
 
     def reset_possible_translations(self):
-        self.select_translation_combo.configure(values=[])
+        self._set_possible_translation_values([])
         self.select_translation_combo.set("No word selected")
 
     def apply_picked_translation_to_selected_token(self, translation: str):
@@ -341,21 +554,47 @@ class Editor(ctk.CTkFrame):
         if (
             selected_token.text != translation
             and selected_token.i + 1 < len(selected_token.doc)
-            and (next_token := selected_token.nbor(1)).pos_ != "PUNCT"
+            and (next_token := selected_token.nbor(1)).pos != PUNCT
         ):
             if not self.settings.filter_start_of_new_word(next_token):
                 translation += "-"
             else:
                 translation += " "
 
-        self.textbox.replace_text(selected_token_tag.range, translation)
+        # The selected token's range is tagged by construction with exactly these
+        self.textbox.replace_text(
+            selected_token_tag.range,
+            translation,
+            tags=(TAG_TRANSLATABLE, TAG_SELECTED_TOKEN, selected_token_tag.tag),
+        )
 
     def set_text(self, text: str):
-        self.set_status("Importing text...")
         self.reset_content()
         self.textbox.insert("1.0", text)
+
+    def begin_import(self) -> str:
+        """Clear the text for an import, and lock it until `end_import`.
+
+        :return str: The cleared text
+        """
+        self.set_status("Importing text...")
+        self.unlock_text()
+        previous_text = self.textbox.get("1.0", "end-1c")
+        self.reset_content()
+        self.textbox.configure(state=ctk.DISABLED)
+        return previous_text
+
+    def end_import(self):
+        self.unlock_text()
         self.reset_status()
 
+    def append_text(self, text: str):
+        # A locked textbox ignores inserts, so it's unlocked just for the insert
+        state = self.textbox.cget("state")
+        self.textbox.configure(state=ctk.NORMAL)
+        self.textbox.insert("end", text)
+        self.textbox.configure(state=state)
+
     def get_text(self):
         return self.textbox.get("1.0", "end")
 
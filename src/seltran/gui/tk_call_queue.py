@@ -1,6 +1,7 @@
 from typing import Any, Callable, Optional, Sequence
-from threading import Lock, Event
-from queue import Queue, Empty
+from collections import deque
+import sys
+from threading import Event, Lock
 import tkinter as tk
 
 
@@ -9,22 +10,35 @@ class UIFuture:
         self._fn = fn
         self._args = args
         self._kwargs = kwargs
+        # Only written before `_finish_event` is set and only read after it's set,
+        # so the event alone orders access to them
         self._result: Any = None
-        self._result_lock: Lock = Lock()
+        self._exception: Optional[Exception] = None
         self._finish_event = Event()
 
     def run(self):
-        self._set_result(self._fn(*self._args, **self._kwargs))
-        self._set_finished()
+        # Waiters must be released even if the call fails, or they'd block forever
+        try:
+            self._set_result(self._fn(*self._args, **self._kwargs))
+        except Exception as error:
+            self._exception = error
+            raise
+        finally:
+            self._set_finished()
 
     def wait(self) -> Any:
+        """Wait for the call to run.
+
+        :raises Exception: The exception raised by the call, if it failed
+        :return Any: The call's return value
+        """
         self._finish_event.wait()
-        with self._result_lock:
-            return self._result
+        if self._exception is not None:
+            raise self._exception
+        return self._result
 
     def _set_result(self, value: Any):
-        with self._result_lock:
-            self._result = value
+        self._result = value
 
     def _set_finished(self):
         self._finish_event.set()
@@ -35,33 +49,41 @@ EVENT_PROCESS_UI_CALLS = "<<ui_call>>"
 
 class TkCallQueue(tk.Tk):
     def __init__(self):
-        self._call_queue: Queue[UIFuture] = Queue()
+        self._call_queue: deque[UIFuture] = deque()
+        self._call_queue_lock = Lock()
         self.bind(EVENT_PROCESS_UI_CALLS, self._ui_call_handler)
 
     def _ui_call_handler(self, event: tk.Event):
-        try:
-            while True:
-                call = self._call_queue.get_nowait()
+        # Take all pending calls at once rather than locking the queue per call.
+        # Calls queued while these run are handled by their own signal.
+        with self._call_queue_lock:
+            calls = list(self._call_queue)
+            self._call_queue.clear()
+
+        for call in calls:
+            # A failed call is reported like any other failed Tk callback, without
+            # dropping the calls after it
+            try:
                 call.run()
-        except Empty:
-            pass
+            except Exception:
+                self.report_callback_exception(*sys.exc_info())
 
     def queue_ui_call(self, fn: Callable, *args, **kwargs) -> UIFuture:
         call = UIFuture(fn, args, kwargs)
-        self._call_queue.put(call)
+        with self._call_queue_lock:
+            self._call_queue.append(call)
         return call
 
     def queue_ui_calls(
         self, calls: Sequence[tuple[Callable, Optional[tuple], Optional[dict]]]
     ) -> tuple[UIFuture, ...]:
-        return tuple(
-            self.queue_ui_call(
-                call[0],
-                *(call[1] if call[1] else tuple()),
-                **(call[2] if call[2] else dict())
-            )
-            for call in calls
-        )
+        futures = [
+            UIFuture(call[0], call[1] or tuple(), call[2] or dict()) for call in calls
+        ]
+        # The whole batch is queued under a single lock
+        with self._call_queue_lock:
+            self._call_queue.extend(futures)
+        return tuple(futures)
 
     def signal_process_ui_calls(self):
         self.event_generate(EVENT_PROCESS_UI_CALLS, when="tail")
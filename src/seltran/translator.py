@@ -1,24 +1,42 @@
-from typing import Iterable, Union, Optional
+from collections import OrderedDict
+from typing import Iterable, Iterator, Union, Optional
+import functools
 import logging
 import spacy
-from spacy.tokens import Token
+from spacy.parts_of_speech import IDS as POS_IDS
+from spacy.tokens import Token, Doc
 from jamdict import Jamdict
 import pykakasi
 import re
+from threading import Lock
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+_WHITESPACE_RUN = re.compile(r"\s+")
+# Splits between paragraphs, keeping the separating blank line in the first one
+_PARAGRAPH_SPLIT = re.compile(r"(?<=\n\n)")
+
+# Texts longer than this are tokenized paragraph by paragraph
+SINGLE_PASS_MAX_CHARS = 4096
+# Number of recently tokenized paragraphs kept for reuse
+PARAGRAPH_CACHE_SIZE = 4096
+
+# Universal POS of tokens offered for translation
+TRANSLATABLE_POS = ("NOUN", "VERB", "ADJ")
+# Universal POS of tokens which start a new word rather than continue the previous one
+WORD_START_POS = ("VERB", "NOUN")
+
 UNIVERSAL_TO_DICTIONARY_POS = {
-    "NOUN": [
+    "NOUN": (
         "noun (common) (futsuumeishi)",
         "noun or participle which takes the aux. verb suru",
         "noun or verb acting prenominally",
         "noun, used as a prefix",
         "noun, used as a suffix",
         "nouns which may take the genitive case particle 'no'",
-    ],
-    "VERB": [
+    ),
+    "VERB": (
         "Godan verb - -aru special class",
         "Godan verb - Iku/Yuku special class",
         "Godan verb with 'bu' ending",
@@ -64,67 +82,99 @@ UNIVERSAL_TO_DICTIONARY_POS = {
         "Yodan verb with 'ru' ending (archaic)",
         "Yodan verb with 'su' ending (archaic)",
         "Yodan verb with 'tsu' ending (archaic)",
-    ],
-    "ADV": [
+    ),
+    "ADV": (
         "adverb (fukushi)",
         "adverb taking the 'to' particle",
-    ],
+    ),
 }
 
 
-def universal_to_dictionary_pos(pos: str) -> Optional[list[str]]:
+def universal_to_dictionary_pos(pos: str) -> Optional[tuple[str, ...]]:
     return UNIVERSAL_TO_DICTIONARY_POS.get(pos)
 
 
+# Unicode ranges for Japanese characters
+JAPANESE_RANGES = [
+    (0x3040, 0x309F),  # Hiragana
+    (0x30A0, 0x30FF),  # Katakana
+    (0x4E00, 0x9FFF),  # Common and Uncommon Kanji
+    (0xF900, 0xFAFF),  # Compatibility Kanji
+    (0xFF65, 0xFF9F),  # Halfwidth Katakana
+    (0x31C0, 0x31EF),  # CJK Strokes
+    (0x3200, 0x32FF),  # Enclosed CJK Letters and Months
+    (0x3000, 0x303F),  # CJK Symbols and Punctuation
+    (0x3130, 0x318F),  # Hangul Compatibility Jamo
+    (0x3190, 0x319F),  # Kanbun
+    (0x31A0, 0x31BF),  # Bopomofo Extended
+    (0x31C0, 0x31EF),  # CJK Strokes
+    (0x31F0, 0x31FF),  # Katakana Phonetic Extensions
+    (0x3200, 0x32FF),  # Enclosed CJK Letters and Months
+    (0x3300, 0x33FF),  # CJK Compatibility
+    (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
+    (0x4E00, 0x9FFF),  # CJK Unified Ideographs
+    (0xF900, 0xFAFF),  # CJK Compatibility Ideographs
+    (0xFE30, 0xFE4F),  # CJK Compatibility Forms
+    (0xFF00, 0xFFEF),  # Halfwidth and Fullwidth Forms
+    (0x20000, 0x2A6DF),  # Supplementary Ideographic Plane
+    (0x2A700, 0x2B73F),  # Supplementary Ideographic Plane
+    (0x2B740, 0x2B81F),  # Supplementary Ideographic Plane
+    (0x2B820, 0x2CEAF),  # Supplementary Ideographic Plane
+]
+
+
+def _merge_ranges(ranges: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Sort code point ranges and merge the ones that overlap or touch.
+
+    :param Iterable[tuple[int, int]] ranges: Inclusive (start, end) code point ranges
+    :return list[tuple[int, int]]: Sorted, disjoint ranges covering the same points
+    """
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# Matches texts made only of characters in `JAPANESE_RANGES`, scanning them in C
+_JAPANESE_TEXT = re.compile(
+    "[%s]*"
+    % "".join(
+        f"{re.escape(chr(start))}-{re.escape(chr(end))}"
+        for start, end in _merge_ranges(JAPANESE_RANGES)
+    )
+)
+
+
+# Token texts repeat heavily, so their results are worth keeping
+@functools.lru_cache(maxsize=8192)
 def is_text_japanese(text):
-    # Unicode ranges for Japanese characters
-    japanese_ranges = [
-        (0x3040, 0x309F),  # Hiragana
-        (0x30A0, 0x30FF),  # Katakana
-        (0x4E00, 0x9FFF),  # Common and Uncommon Kanji
-        (0xF900, 0xFAFF),  # Compatibility Kanji
-        (0xFF65, 0xFF9F),  # Halfwidth Katakana
-        (0x31C0, 0x31EF),  # CJK Strokes
-        (0x3200, 0x32FF),  # Enclosed CJK Letters and Months
-        (0x3000, 0x303F),  # CJK Symbols and Punctuation
-        (0x3130, 0x318F),  # Hangul Compatibility Jamo
-        (0x3190, 0x319F),  # Kanbun
-        (0x31A0, 0x31BF),  # Bopomofo Extended
-        (0x31C0, 0x31EF),  # CJK Strokes
-        (0x31F0, 0x31FF),  # Katakana Phonetic Extensions
-        (0x3200, 0x32FF),  # Enclosed CJK Letters and Months
-        (0x3300, 0x33FF),  # CJK Compatibility
-        (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
-        (0x4E00, 0x9FFF),  # CJK Unified Ideographs
-        (0xF900, 0xFAFF),  # CJK Compatibility Ideographs
-        (0xFE30, 0xFE4F),  # CJK Compatibility Forms
-        (0xFF00, 0xFFEF),  # Halfwidth and Fullwidth Forms
-        (0x20000, 0x2A6DF),  # Supplementary Ideographic Plane
-        (0x2A700, 0x2B73F),  # Supplementary Ideographic Plane
-        (0x2B740, 0x2B81F),  # Supplementary Ideographic Plane
-        (0x2B820, 0x2CEAF),  # Supplementary Ideographic Plane
-    ]
-
-    for char in text:
-        if not any(start <= ord(char) <= end for start, end in japanese_ranges):
-            return False
-    return True
+    # All Japanese ranges lie above ASCII, and `isascii` doesn't scan the text
+    if text.isascii():
+        return not text
+    return _JAPANESE_TEXT.fullmatch(text) is not None
 
 
 class TokenFilter(object):
-    def __init__(self, include_pos=[], exclude_lemmas=[], exclude_foreign=False):
-        self.include_pos = include_pos
-        self.exclude_lemmas = exclude_lemmas
+    def __init__(self, include_pos=(), exclude_lemmas=(), exclude_foreign=False):
+        self.include_pos = frozenset(include_pos)
+        # Universal POS tags have fixed symbol ids, so tokens' integer `pos` can be
+        # matched without resolving their `pos_` strings
+        self._include_pos_ids = frozenset(
+            POS_IDS[pos] for pos in self.include_pos if pos in POS_IDS
+        )
+        self.exclude_lemmas = frozenset(exclude_lemmas)
         self.exclude_foreign = exclude_foreign
 
     def __call__(self, token: Token):
-        return all(
-            match(token)
-            for match in [
-                self._match_pos,
-                self._match_lemma,
-                self._match_foreign_chars,
-            ]
+        # Cheapest checks first, so most tokens are rejected before the text scan
+        return (
+            self._match_pos(token)
+            and self._match_lemma(token)
+            and self._match_foreign_chars(token)
         )
 
     def _match_foreign_chars(self, token: Token) -> bool:
@@ -133,7 +183,7 @@ class TokenFilter(object):
         return True
 
     def _match_pos(self, token: Token) -> bool:
-        return token.pos_ in self.include_pos
+        return token.pos in self._include_pos_ids
 
     def _match_lemma(self, token: Token) -> bool:
         return token.lemma_ not in self.exclude_lemmas
@@ -142,37 +192,102 @@ class TokenFilter(object):
 class JapaneseTranslator(object):
     def __init__(self):
         self.should_translate = TokenFilter(
-            include_pos=[
-                "NOUN",
-                "VERB",
-                "ADJ",
-            ],
-            exclude_foreign=True,
-        )
-        self.word_start_filter = TokenFilter(
-            include_pos=[
-                "VERB",
-                "NOUN",
-            ]
+            include_pos=TRANSLATABLE_POS, exclude_foreign=True
         )
-        self.nlp = spacy.load("ja_ginza")
+        self.word_start_filter = TokenFilter(include_pos=WORD_START_POS)
+        # Only token text, POS and lemma are consumed, so named entities and
+        # bunsetu spans are never needed
+        self.nlp = spacy.load("ja_ginza", exclude=["ner", "bunsetu_recognizer"])
         self._jamdict = Jamdict()
         self._kks = pykakasi.kakasi()
+        # Bound per instance as `self` is not a meaningful cache key
+        self._lookup_translations = functools.lru_cache(maxsize=8192)(
+            self._do_lookup_translations
+        )
+        self._text_to_phonemes = functools.lru_cache(maxsize=4096)(
+            self._do_text_to_phonemes
+        )
+        # Whole documents are kept, so only remember the last few
+        self._tokenize_cached = functools.lru_cache(maxsize=8)(self._do_tokenize)
+        self._paragraph_docs: OrderedDict[str, Doc] = OrderedDict()
+        # The translator is shared by every editor, each detecting tokens on its own
+        # thread. This keeps them from running the pipeline or updating the paragraph
+        # cache at the same time.
+        self._tokenize_lock = Lock()
+
+    def tokenize(self, text: str) -> Doc:
+        with self._tokenize_lock:
+            return self._tokenize_cached(text)
+
+    def _do_tokenize(self, text: str) -> Doc:
+        if len(text) <= SINGLE_PASS_MAX_CHARS:
+            return next(self.tokenize_many([text]))
+
+        # Batching paragraphs through the pipeline is faster than a single huge
+        # document. The paragraphs keep their separators, so the merged document
+        # has the exact same text and character offsets.
+        paragraphs = [p for p in _PARAGRAPH_SPLIT.split(text) if p]
+        return Doc.from_docs(
+            self._tokenize_paragraphs(paragraphs), ensure_whitespace=False
+        )
+
+    def _tokenize_paragraphs(self, paragraphs: list[str]) -> list[Doc]:
+        """Tokenize paragraphs, reusing the documents of recently tokenized ones.
+
+        After an edit only the edited paragraphs are passed through the pipeline again.
+        """
+        unique_paragraphs = dict.fromkeys(paragraphs)
+        missing = [p for p in unique_paragraphs if p not in self._paragraph_docs]
+        for paragraph, doc in zip(missing, self.tokenize_many(missing)):
+            self._paragraph_docs[paragraph] = doc
+
+        docs = []
+        for paragraph in paragraphs:
+            self._paragraph_docs.move_to_end(paragraph)
+            docs.append(self._paragraph_docs[paragraph])
+
+        while len(self._paragraph_docs) > PARAGRAPH_CACHE_SIZE:
+            self._paragraph_docs.popitem(last=False)
+        return docs
+
+    def tokenize_many(
+        self, texts: Iterable[str], batch_size: int = 64
+    ) -> Iterator[Doc]:
+        """Tokenize multiple texts (e.g. subtitle lines) in batches.
+
+        :param Iterable[str] texts: Texts to tokenize
+        :param int batch_size: Number of texts to process per batch
+        :return Iterator[Doc]: Tokenized documents, in the order of `texts`
+        """
+        return self.nlp.pipe(texts, batch_size=batch_size)
 
     def _format_dictionary_gloss(self, text: str) -> str:
         text = self._format_english(text)
 
-        match = re.search(r"^(TO-)?(?P<word>.+?)(-\(.*\))?$", text)
-        if match is None:
+        if not text:
             logger.error(f"Failed to parse dictionary gloss {text}")
             return "<ERROR_PARSING_DICTIONARY_GLOSS>"
 
-        return match.group("word")
+        # Drop the infinitive "to", unless it's the whole gloss
+        if text.startswith("TO-") and len(text) > 3:
+            text = text[3:]
+        # Drop a trailing parenthesized note, from its first possible start
+        if text.endswith(")"):
+            note_start = text.find("-(", 1)
+            if note_start != -1:
+                text = text[:note_start]
+
+        return text
 
     def _format_english(self, text: str) -> str:
-        return "-".join(text.strip().split()).upper()
+        return _WHITESPACE_RUN.sub("-", text.strip()).upper()
 
     def get_dictionary_translations(self, token: Token) -> list[str]:
+        """Get dictionary translations of a token, in dictionary order.
+
+        :param Token token: Token to translate
+        :return list[str]: Formatted translations
+        """
         dictionary_pos = universal_to_dictionary_pos(token.pos_)
         if dictionary_pos is None:
             logger.warning(
@@ -180,16 +295,43 @@ class JapaneseTranslator(object):
             )
             return []
 
+        return list(self._lookup_translations(token.lemma_, token.pos_))
+
+    def _do_lookup_translations(self, lemma: str, pos: str) -> tuple[str, ...]:
         definitions = self._jamdict.lookup(
-            token.lemma_, pos=dictionary_pos, strict_lookup=True
+            lemma, pos=universal_to_dictionary_pos(pos), strict_lookup=True
         ).entries
 
-        return [
+        return tuple(
             self._format_dictionary_gloss(str(gloss))
             for t in definitions
             for sense in t.senses
             for gloss in sense.gloss
-        ]
+        )
 
     def get_phonemes(self, token: Token) -> str:
-        return " ".join(kks["hepburn"] for kks in self._kks.convert(token.text))
+        return self._text_to_phonemes(token.text)
+
+    def _do_text_to_phonemes(self, text: str) -> str:
+        return " ".join(kks["hepburn"] for kks in self._kks.convert(text))
+
+
+_shared_translator: Optional[JapaneseTranslator] = None
+_shared_translator_lock = Lock()
+
+
+def get_shared_translator() -> JapaneseTranslator:
+    """Get the process-wide translator, loading it on first use.
+
+    Loading the translator's NLP model and dictionary is slow and memory heavy,
+    so a single instance is shared by all its users.
+    """
+    global _shared_translator
+    with _shared_translator_lock:
+        if _shared_translator is None:
+            _shared_translator = JapaneseTranslator()
+        return _shared_translator
+
+
+def is_shared_translator_loaded() -> bool:
+    return _shared_translator is not None